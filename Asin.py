@@ -1,24 +1,66 @@
 import streamlit as st
 import pandas as pd
-import time
+import numpy as np
+import os
 import re
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, event, text
 from datetime import datetime
+import lxml.html
+from lxml.etree import XPath, ParserError
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Selenium imports
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
 DB_PATH = "asin_checker.db"
 engine = create_engine(f"sqlite:///" + DB_PATH)
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _):
+    # WAL lets readers and the status-check writer overlap; NORMAL sync is safe under WAL
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA cache_size=-20000")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
 BASE_PRODUCT_COLS = ["ASIN", "URL", "Collection Name", "Size", "Color", "Customer"]
 RESULT_COLS = ["Final URL", "Price", "Is Redirect", "Is Unavailable", "Orderable", "Last Checked"]
 
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+UA_HEADERS = {"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"}
+
+# Pages shorter than this are treated as bot-check pages and retried in Chrome
+MIN_PRODUCT_HTML_LEN = 10000
+
+_ASIN_DP_RE = re.compile(r"/dp/([A-Z0-9]{10})|/gp/product/([A-Z0-9]{10})")
+_ASIN_DP_ONLY_RE = re.compile(r"/dp/([A-Z0-9]{10})")
+
+# Product page parsing
+PRICE_IDS = ['price_inside_buybox', 'priceblock_ourprice', 'priceblock_dealprice', 'priceblock_saleprice']
+_BY_ID_XPATH = XPath("//*[@id=$id]")
+_PRICE_WHOLE_XPATH = XPath("//span[contains(concat(' ', normalize-space(@class), ' '), ' a-price-whole ')]")
+_PRICE_FRACTION_XPATH = XPath("//span[contains(concat(' ', normalize-space(@class), ' '), ' a-price-fraction ')]")
+_PRICE_OFFSCREEN_XPATH = XPath("//span[contains(concat(' ', normalize-space(@class), ' '), ' a-offscreen ')]")
+_BUY_BUTTON_XPATH = XPath("//*[(self::input or self::button) and (@id='add-to-cart-button' or @id='buy-now-button')]")
+
+# Status-check concurrency and browser fallback pool
+POOL_SIZE = int(os.environ.get("ASIN_POOL_SIZE", "4"))
+MAX_USES_PER_INSTANCE = 50
+
 st.set_page_config(page_title="ASIN Manager & Dashboard", layout="wide")
 
 # --- Subtle, professional UI styling with home textiles theme ---
@@ -124,8 +166,12 @@ a {
 """, unsafe_allow_html=True)
 
 # Database & Utility Functions
-def extract_asin(url):
-    match = re.search(r"/dp/([A-Z0-9]{10})|/gp/product/([A-Z0-9]{10})", url)
+def extract_asin(url, strict=False):
+    # strict: only trust /dp/ links and return None otherwise (used to compare redirects)
+    if strict:
+        match = _ASIN_DP_ONLY_RE.search(url)
+        return match.group(1) if match else None
+    match = _ASIN_DP_RE.search(url)
     if match:
         return match.group(1) or match.group(2)
     parts = url.strip("/").split("/")
@@ -134,55 +180,92 @@ def extract_asin(url):
             return part
     return ""
 
-def ensure_table():
-    with engine.begin() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS asins (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                "ASIN" TEXT,
-                "URL" TEXT,
-                "Collection Name" TEXT,
-                "Size" TEXT,
-                "Color" TEXT,
-                "Customer" TEXT
-            )
-        """))
+def ensure_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS asins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            "ASIN" TEXT,
+            "URL" TEXT,
+            "Collection Name" TEXT,
+            "Size" TEXT,
+            "Color" TEXT,
+            "Customer" TEXT
+        )
+    """))
 
-def ensure_status_columns():
+def ensure_status_columns(conn):
     col_defs = {col: "TEXT" for col in RESULT_COLS}
+    res = conn.execute(text("PRAGMA table_info(asins)"))
+    current_cols = [row[1] for row in res.fetchall()]
+    for col, coltype in col_defs.items():
+        if col not in current_cols:
+            try:
+                conn.execute(text(f'ALTER TABLE asins ADD COLUMN "{col}" {coltype}'))
+            except Exception:
+                pass
+
+def ensure_url_index():
+    # Fails on legacy databases that already hold duplicate URLs; inserts guard themselves anyway
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS idx_asins_url ON asins("URL")'))
+    except Exception:
+        pass
+
+# Schema setup runs once per server process, not on every read or write
+@st.cache_resource
+def init_schema():
     with engine.begin() as conn:
-        res = conn.execute(text("PRAGMA table_info(asins)"))
-        current_cols = [row[1] for row in res.fetchall()]
-        for col, coltype in col_defs.items():
-            if col not in current_cols:
-                try:
-                    conn.execute(text(f'ALTER TABLE asins ADD COLUMN "{col}" {coltype}'))
-                except Exception:
-                    pass
+        ensure_table(conn)
+        ensure_status_columns(conn)
+    ensure_url_index()
 
-def get_all_asins():
-    ensure_table()
-    ensure_status_columns()
-    df = pd.read_sql('SELECT * FROM asins', con=engine)
-    for col in BASE_PRODUCT_COLS + RESULT_COLS + ["id"]:
+init_schema()
+
+def db_mtime():
+    # Under WAL, commits land in the -wal file until a checkpoint, so watch both
+    mtime = os.path.getmtime(DB_PATH)
+    try:
+        mtime = max(mtime, os.path.getmtime(DB_PATH + "-wal"))
+    except OSError:
+        # No -wal file, or SQLite removed it as the last connection closed
+        pass
+    return mtime
+
+# Cached per DB mtime; writers below also clear it so same-second edits show up
+@st.cache_data(show_spinner=False)
+def _load_all_asins(mtime, cols=None):
+    if cols:
+        col_list = ", ".join('"' + col.replace('"', '""') + '"' for col in cols)
+        df = pd.read_sql(f'SELECT {col_list} FROM asins', con=engine)
+    else:
+        df = pd.read_sql('SELECT * FROM asins', con=engine)
+    for col in cols or BASE_PRODUCT_COLS + RESULT_COLS + ["id"]:
         if col not in df.columns:
             df[col] = ""
     return df
 
+def clear_asin_caches():
+    _load_all_asins.clear()
+    build_report_excel.clear()
+
+def get_all_asins(cols=None):
+    # cols projects the SELECT to just those columns; None loads the whole table
+    return _load_all_asins(db_mtime(), tuple(cols) if cols else None)
+
+# Skips URLs already in the table via the idx_asins_url lookup
+INSERT_ASIN_IF_NEW_SQL = """
+    INSERT OR IGNORE INTO asins ("ASIN", "URL", "Collection Name", "Size", "Color", "Customer")
+    SELECT :ASIN, :URL, :Collection_Name, :Size, :Color, :Customer
+    WHERE NOT EXISTS (SELECT 1 FROM asins WHERE "URL" = :URL)
+"""
+
 def add_asin_row(row_dict):
-    ensure_table()
-    ensure_status_columns()
-    df_all = get_all_asins()
-    if "URL" in df_all.columns and row_dict["URL"] in df_all["URL"].values:
-        return False
     asin = extract_asin(row_dict["URL"])
     try:
         with engine.begin() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO asins ("ASIN", "URL", "Collection Name", "Size", "Color", "Customer")
-                    VALUES (:ASIN, :URL, :Collection_Name, :Size, :Color, :Customer)
-                """),
+            result = conn.execute(
+                text(INSERT_ASIN_IF_NEW_SQL),
                 {
                     "ASIN": asin,
                     "URL": row_dict["URL"],
@@ -192,55 +275,104 @@ def add_asin_row(row_dict):
                     "Customer": row_dict["Customer"]
                 }
             )
+        if result.rowcount != 1:
+            return False
+        clear_asin_caches()
         return True
     except Exception as e:
         st.error(f"ERROR inserting row for URL {row_dict['URL']}: {e}")
         return False
 
 def add_asins_bulk(df_upload):
-    ensure_table()
-    ensure_status_columns()
-    df_all = get_all_asins()
-    added, skipped = 0, 0
-    for i, row in df_upload.iterrows():
-        row_dict = row.to_dict()
-        if "URL" in df_all.columns and row_dict["URL"] in df_all["URL"].values:
-            skipped += 1
-            continue
-        result = add_asin_row(row_dict)
-        if result:
-            added += 1
-        else:
-            st.error(f"Could not add row in bulk for URL: {row_dict['URL']}")
-    return added, skipped
-
-def delete_asin(id):
-    with engine.begin() as conn:
-        conn.execute(text("DELETE FROM asins WHERE id = :id"), {"id": id})
-
-def update_asin(id, asin, url, collection, size, color, customer):
+    df_all = get_all_asins(cols=["URL"])
+    # Compare stripped strings on both sides, as the manual add form does; older bulk
+    # uploads stored URLs unstripped
+    existing_urls = set(df_all["URL"].dropna().astype(str).str.strip())
+    # Missing and whitespace-only URLs both become "" and are skipped
+    df_upload = df_upload.assign(URL=df_upload["URL"].astype("string").str.strip().fillna(""))
+    new_df = (
+        df_upload[(df_upload["URL"] != "") & ~df_upload["URL"].isin(existing_urls)]
+        .drop_duplicates(subset="URL")
+        .reindex(columns=BASE_PRODUCT_COLS)
+    )
+    new_df["ASIN"] = new_df["URL"].map(extract_asin)
+    params = new_df.rename(columns={"Collection Name": "Collection_Name"}).to_dict("records")
+    if not params:
+        return 0, len(df_upload)
+    # One transaction and one executemany for the whole upload; URLs added by another
+    # session since the read above are ignored rather than failing the whole batch
+    try:
+        with engine.begin() as conn:
+            result = conn.execute(text(INSERT_ASIN_IF_NEW_SQL), params)
+        clear_asin_caches()
+    except Exception as e:
+        st.error(f"ERROR inserting {len(params)} row(s) in bulk: {e}")
+        return 0, len(df_upload) - len(params)
+    added = result.rowcount
+    return added, len(df_upload) - added
+
+def delete_asin_many(ids):
+    ids = [int(i) for i in ids if pd.notnull(i)]
+    if not ids:
+        return
     with engine.begin() as conn:
         conn.execute(
-            text("""
-                UPDATE asins SET
-                "ASIN"=:ASIN, "URL"=:URL, "Collection Name"=:Collection,
-                "Size"=:Size, "Color"=:Color, "Customer"=:Customer
-                WHERE id=:id
-            """),
-            {
-                "id": id,
-                "ASIN": asin,
-                "URL": url,
-                "Collection": collection,
-                "Size": size,
-                "Color": color,
-                "Customer": customer
-            }
+            text("DELETE FROM asins WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids}
         )
-
-def update_status_columns(row):
-    row_id = row.get("id", row.get("ID"))
-    if pd.isnull(row_id):
+    clear_asin_caches()
+
+def update_asin_many(rows):
+    # rows are (id, asin, url, collection, size, color, customer) tuples
+    params = [
+        {
+            "id": int(id),
+            "ASIN": asin,
+            "URL": url,
+            "Collection": collection,
+            "Size": size,
+            "Color": color,
+            "Customer": customer
+        }
+        for id, asin, url, collection, size, color, customer in rows
+        if pd.notnull(id)
+    ]
+    if not params:
+        return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE asins SET
+                    "ASIN"=:ASIN, "URL"=:URL, "Collection Name"=:Collection,
+                    "Size"=:Size, "Color"=:Color, "Customer"=:Customer
+                    WHERE id=:id
+                """),
+                params
+            )
+    except Exception as e:
+        st.error(f"ERROR saving edits (no changes were written): {e}")
+        return False
+    clear_asin_caches()
+    return True
+
+def update_status_columns(rows):
+    last_checked = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    params = []
+    for row in rows:
+        row_id = row.get("id", row.get("ID"))
+        if pd.isnull(row_id):
+            continue
+        params.append({
+            "final_url": row.get("Final URL", None),
+            "price": row.get("Price", None),
+            "is_redirect": row.get("Is Redirect", None),
+            "is_unavailable": row.get("Is Unavailable", None),
+            "orderable": row.get("Orderable", None),
+            "last_checked": last_checked,
+            "id": int(row_id)
+        })
+    if not params:
         return
     with engine.begin() as conn:
         conn.execute(
@@ -254,127 +386,257 @@ def update_status_columns(row):
                     "Last Checked" = :last_checked
                 WHERE id = :id
             """),
-            {
-                "final_url": row.get("Final URL", None),
-                "price": row.get("Price", None),
-                "is_redirect": row.get("Is Redirect", None),
-                "is_unavailable": row.get("Is Unavailable", None),
-                "orderable": row.get("Orderable", None),
-                "last_checked": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "id": int(row_id)
-            }
+            params
         )
+    clear_asin_caches()
 
+@st.cache_data(show_spinner=False)
 def get_empty_template():
     df_template = pd.DataFrame(columns=BASE_PRODUCT_COLS)
     output = BytesIO()
     df_template.to_excel(output, index=False)
-    output.seek(0)
-    return output
-
-# Selenium Scraping Utils
-def extract_asin_from_url(url):
-    match = re.search(r"/dp/([A-Z0-9]{10})", url)
-    if match:
-        return match.group(1)
-    return None
+    return output.getvalue()
+
+def build_results_frame(mtime, filters):
+    df_display = apply_filters(_load_all_asins(mtime), filters)
+    if "Last Checked" in df_display.columns:
+        df_display["Last Checked"] = pd.to_datetime(df_display["Last Checked"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
+    if "Price" in df_display.columns:
+        df_display["Price"] = format_price_column(df_display["Price"])
+    return df_display
+
+# Keyed on the DB mtime and the active filters rather than a hash of the frame;
+# bounded so each distinct filter/re-check doesn't leave an xlsx blob in memory for good
+@st.cache_data(show_spinner=False, max_entries=4)
+def build_report_excel(mtime, filters):
+    df = build_results_frame(mtime, filters)
+    output = BytesIO()
+    df[BASE_PRODUCT_COLS + RESULT_COLS].to_excel(output, index=False)
+    return output.getvalue()
 
-def get_final_url_and_html(driver, url):
+# Scraping Utils
+def is_bot_check_page(resp):
+    if resp.status_code == 503:
+        return True
+    return "/errors/validateCaptcha" in resp.text or len(resp.text) < MIN_PRODUCT_HTML_LEN
+
+# Keep-alive HTTP session shared by status-check workers; cached so connections survive reruns
+@st.cache_resource(show_spinner=False)
+def get_session():
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=POOL_SIZE, max_retries=Retry(total=2, backoff_factor=0.3)))
+    return session
+
+def get_final_url_and_html(url, session=None, pool=None):
+    if session is None:
+        session = get_session()
     try:
-        driver.get(url)
-        time.sleep(8)
-        final_url = driver.current_url
-        html = driver.page_source
-        return final_url, html
-    except TimeoutException:
-        return url, ""
-
-def extract_price_from_html(html):
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
-    price_ids = [
-        'price_inside_buybox', 'priceblock_ourprice',
-        'priceblock_dealprice', 'priceblock_saleprice',
-    ]
-    for pid in price_ids:
-        el = soup.find(id=pid)
-        if el and el.text.strip():
-            return el.text.strip().replace('\n', '').replace('$', '').strip()
-    price_whole = soup.find('span', {'class': 'a-price-whole'})
-    price_fraction = soup.find('span', {'class': 'a-price-fraction'})
+        r = session.get(url, headers=UA_HEADERS, allow_redirects=True, timeout=10)
+        if r.status_code == 404 or not is_bot_check_page(r):
+            return r.url, r.text
+    except requests.RequestException:
+        pass
+    return get_final_url_and_html_browser(url, pool)
+
+def parse_html(html):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.fromstring(html)
+    except (ParserError, ValueError):
+        return None
+
+def extract_price(tree):
+    if tree is None:
+        return ""
+    for pid in PRICE_IDS:
+        found = _BY_ID_XPATH(tree, id=pid)
+        if found and found[0].text_content().strip():
+            return found[0].text_content().strip().replace('\n', '').replace('$', '').strip()
+    price_whole = _PRICE_WHOLE_XPATH(tree)
+    price_fraction = _PRICE_FRACTION_XPATH(tree)
     if price_whole:
-        whole = price_whole.text.strip().replace(',', '').replace('$', '')
-        fraction = price_fraction.text.strip() if price_fraction else "00"
+        whole = price_whole[0].text_content().strip().replace(',', '').replace('$', '')
+        fraction = price_fraction[0].text_content().strip() if price_fraction else "00"
         if whole.endswith('.'):
             whole = whole[:-1]
         price = f"{whole}.{fraction}"
         return price
-    price_offscreen = soup.find('span', {'class': 'a-offscreen'})
-    if price_offscreen and price_offscreen.text.strip():
-        return price_offscreen.text.strip().replace('\n', '').replace('$', '').strip()
+    price_offscreen = _PRICE_OFFSCREEN_XPATH(tree)
+    if price_offscreen and price_offscreen[0].text_content().strip():
+        return price_offscreen[0].text_content().strip().replace('\n', '').replace('$', '').strip()
     return ""
 
-def is_orderable_from_html(html):
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
-    add_to_cart = soup.find('input', {'id': 'add-to-cart-button'})
-    buy_now = soup.find('input', {'id': 'buy-now-button'})
-    atc_button = soup.find('button', {'id': 'add-to-cart-button'})
-    buy_now_button = soup.find('button', {'id': 'buy-now-button'})
-    if add_to_cart or buy_now or atc_button or buy_now_button:
-        return True
-    unavailable_texts = [
-        "Currently unavailable", "We don't know when or if this item will be back",
-        "This product is not available", "out of stock", "unavailable",
-        "Sorry, we couldn't find that page."
-    ]
-    for msg in unavailable_texts:
-        if msg.lower() in html.lower():
-            return False
-    return False
-
-def process_asin(driver, input_url):
-    original_asin = extract_asin_from_url(input_url)
-    final_url, html = get_final_url_and_html(driver, input_url)
-    final_asin = extract_asin_from_url(final_url)
-    price = extract_price_from_html(html)
+def is_orderable(tree):
+    # Orderable only when a buy box button is present; anything else counts as unavailable
+    if tree is None:
+        return False
+    return bool(_BUY_BUTTON_XPATH(tree))
+
+def process_asin(input_url, session=None, pool=None):
+    original_asin = extract_asin(input_url, strict=True)
+    final_url, html = get_final_url_and_html(input_url, session, pool)
+    final_asin = extract_asin(final_url, strict=True)
+    # Parse the page once for both price and orderable checks
+    tree = parse_html(html)
+    price = extract_price(tree)
     is_redirect = (original_asin != final_asin)
-    orderable = is_orderable_from_html(html)
+    orderable = is_orderable(tree)
     is_unavailable = not orderable
     if is_redirect:
         orderable = False
         is_unavailable = True
     return final_url, price, is_redirect, is_unavailable, orderable
 
-def run_status_check(df):
+def get_chrome_options():
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    # Only the HTML is parsed, so skip images, stylesheets and fonts
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+    return chrome_options
+
+@st.cache_resource(show_spinner=False)
+def chromedriver_path():
+    return ChromeDriverManager().install()
+
+BLOCKED_RESOURCE_URLS = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.css", "*.woff", "*.woff2", "*.ttf"]
+
+def new_driver():
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=get_chrome_options())
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_URLS})
+    return driver
+
+def create_driver_pool(size=POOL_SIZE):
+    # Each slot is (driver, number of pages it has loaded); drivers start lazily on first use
+    pool = queue.Queue()
+    for _ in range(size):
+        pool.put((None, 0))
+    return pool
+
+def close_driver_pool(pool):
+    # The pool is shared across sessions, so another worker may take a slot at any moment
+    slots = []
+    while True:
+        try:
+            slots.append(pool.get_nowait())
+        except queue.Empty:
+            break
+    for driver, _ in slots:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        pool.put((None, 0))
+
+@st.cache_resource(show_spinner=False)
+def get_driver_pool():
+    return create_driver_pool()
+
+def get_final_url_and_html_selenium(driver, url):
+    try:
+        driver.get(url)
+        # Return as soon as a buy box or out-of-stock marker renders, up to 8s
+        try:
+            WebDriverWait(driver, 8).until(EC.any_of(
+                EC.presence_of_element_located((By.ID, "add-to-cart-button")),
+                EC.presence_of_element_located((By.ID, "buy-now-button")),
+                EC.presence_of_element_located((By.CSS_SELECTOR, "span.a-price-whole")),
+                EC.presence_of_element_located((By.ID, "outOfStock")),
+            ))
+        except TimeoutException:
+            pass
+        final_url = driver.current_url
+        html = driver.page_source
+        return final_url, html
+    except TimeoutException:
+        return url, ""
 
-    final_urls, prices, redirects, unavailables, orderables = [], [], [], [], []
+def get_final_url_and_html_browser(url, pool=None):
+    if pool is None:
+        pool = get_driver_pool()
+    driver, uses = pool.get()
+    healthy = False
+    try:
+        if driver is None:
+            driver, uses = new_driver(), 0
+        result = get_final_url_and_html_selenium(driver, url)
+        healthy = True
+        return result
+    finally:
+        uses += 1
+        # Recycle drivers that errored or have served too many pages
+        if not healthy or uses >= MAX_USES_PER_INSTANCE:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            driver, uses = None, 0
+        pool.put((driver, uses))
+
+def check_url(url, session, pool):
+    # One failing URL (e.g. Chrome fallback unavailable) must not sink the rest of the batch
+    try:
+        return process_asin(url, session, pool), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def run_status_check(df):
+    urls = list(df["URL"])
+    # The session and driver pool are resolved here, in the script thread, and handed to the
+    # workers. chromedriver_path() is left to new_driver() in the worker that first needs
+    # Chrome, so batches with no bot-check pages never download a driver.
+    session = get_session()
+    pool = get_driver_pool()
+    results = [None] * len(urls)
     progress = st.progress(0, text="Checking ASINs...")
+    done = 0
 
-    for idx, url in enumerate(df["URL"]):
-        final_url, price, is_redirect, is_unavailable, orderable = process_asin(driver, url)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(POOL_SIZE, len(urls)))) as executor:
+            futures = {executor.submit(check_url, url, session, pool): idx for idx, url in enumerate(urls)}
+            # Progress is reported from the main thread; Streamlit calls are not thread-safe
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+                progress.progress(done/len(urls), text=f"Checking {done} of {len(urls)} ASINs...")
+    finally:
+        # Idle Chrome is memory-heavy, so quit drivers between batches; the pool slots stay cached
+        close_driver_pool(pool)
+
+    # Only rows that were actually checked get written back; failures are kept for
+    # report_status_check, since the callers rerun the script right after this returns
+    checked = [error is None for _, error in results]
+    failures = [(url, error) for url, (_, error) in zip(urls, results) if error is not None]
+    st.session_state["status_check_failures"] = failures
+    df = df[checked].copy()
+    results = [result for result, error in results if error is None]
+
+    final_urls, prices, redirects, unavailables, orderables = [], [], [], [], []
+    for final_url, price, is_redirect, is_unavailable, orderable in results:
         final_urls.append(final_url)
         prices.append(price)
         redirects.append("Yes" if is_redirect else "No")
         unavailables.append("Yes" if is_unavailable else "No")
         orderables.append("Yes" if orderable else "No")
-        progress.progress((idx+1)/len(df), text=f"Checking {idx+1} of {len(df)} ASINs...")
 
-    driver.quit()
     df["Final URL"] = final_urls
     df["Price"] = prices
     df["Is Redirect"] = redirects
     df["Is Unavailable"] = unavailables
     df["Orderable"] = orderables
 
-    db_df = get_all_asins()
+    db_df = get_all_asins(cols=["id", "URL"])
     id_col = "id" if "id" in db_df.columns else ("ID" if "ID" in db_df.columns else None)
     if not id_col:
         st.error("No 'id' column found in database.")
@@ -387,10 +649,34 @@ def run_status_check(df):
         return df
 
     df = df[df[id_col].notnull()]
-    for _, row in df.iterrows():
-        update_status_columns(row)
+    update_status_columns(df.to_dict("records"))
     return df
 
+def apply_filters(df, pairs):
+    # Case-insensitive substring filters combined into one mask, applied once
+    mask = pd.Series(True, index=df.index)
+    for col, val in pairs:
+        if val:
+            col_lower = df[col].fillna("").astype(str).str.lower()
+            mask &= col_lower.str.contains(val.lower(), regex=False)
+    return df[mask]
+
+def format_price_column(prices):
+    price_str = prices.astype(str)
+    has_price = prices.notna() & (price_str.str.strip() != "")
+    return np.where(has_price, "$" + price_str, "")
+
+def report_status_check():
+    # Shows the outcome of the status check that ran before the last rerun, once
+    failures = st.session_state.pop("status_check_failures", None)
+    if failures is None:
+        return
+    if not failures:
+        st.success("Status check complete! Data updated.")
+        return
+    st.warning(f"Status check finished, but {len(failures)} URL(s) could not be checked and kept their previous status:")
+    st.dataframe(pd.DataFrame(failures, columns=["URL", "Error"]), use_container_width=True, hide_index=True)
+
 def select_all_checkbox(df, key_prefix):
     all_selected = st.checkbox("Select All Visible", value=False, key=f"{key_prefix}_select_all")
     if all_selected:
@@ -423,6 +709,7 @@ def login_page():
 # --- ASIN DASHBOARD UI ---
 def asin_dashboard():
     st.title("ASIN Product Manager & Dashboard")
+    report_status_check()
 
     tab1, tab_select, tab_result, tab3 = st.tabs([
         "Manage Products",
@@ -481,7 +768,7 @@ def asin_dashboard():
         st.divider()
         st.subheader("Current Product Database (Edit, Select, Bulk Delete)")
 
-        df_asins = get_all_asins()
+        df_asins = get_all_asins(cols=["id"] + BASE_PRODUCT_COLS)
         id_col = "id" if "id" in df_asins.columns else ("ID" if "ID" in df_asins.columns else None)
         show_cols = [id_col] + BASE_PRODUCT_COLS if id_col else BASE_PRODUCT_COLS
         df_show = df_asins[show_cols].copy()
@@ -495,18 +782,14 @@ def asin_dashboard():
             filter_color = fcols[3].text_input("Color", key="f_color_manage")
             filter_customer = fcols[4].text_input("Customer", key="f_cust_manage")
             filter_url = fcols[5].text_input("URL", key="f_url_manage")
-            if filter_asin:
-                df_show = df_show[df_show["ASIN"].str.contains(filter_asin, case=False, na=False)]
-            if filter_collection:
-                df_show = df_show[df_show["Collection Name"].str.contains(filter_collection, case=False, na=False)]
-            if filter_size:
-                df_show = df_show[df_show["Size"].str.contains(filter_size, case=False, na=False)]
-            if filter_color:
-                df_show = df_show[df_show["Color"].str.contains(filter_color, case=False, na=False)]
-            if filter_customer:
-                df_show = df_show[df_show["Customer"].str.contains(filter_customer, case=False, na=False)]
-            if filter_url:
-                df_show = df_show[df_show["URL"].str.contains(filter_url, case=False, na=False)]
+            df_show = apply_filters(df_show, [
+                ("ASIN", filter_asin),
+                ("Collection Name", filter_collection),
+                ("Size", filter_size),
+                ("Color", filter_color),
+                ("Customer", filter_customer),
+                ("URL", filter_url),
+            ])
 
         # Select all checkbox
         df_show.insert(0, "Selected", False)
@@ -528,21 +811,19 @@ def asin_dashboard():
         col1, col2 = st.columns(2)
         with col1:
             if st.button(f"Delete Selected ({len(selected_rows)})", key="bulk_delete_manage"):
-                for row_id in selected_rows[id_col]:
-                    delete_asin(row_id)
+                delete_asin_many(selected_rows[id_col])
                 st.success(f"Deleted {len(selected_rows)} ASIN(s).")
                 st.experimental_rerun()
         with col2:
             if st.button("Save Edits", key="save_edits_manage"):
-                for _, row in edited.iterrows():
-                    update_asin(row[id_col], row["ASIN"], row["URL"], row["Collection Name"], row["Size"], row["Color"], row["Customer"])
-                st.success("All changes saved!")
-                st.experimental_rerun()
+                if update_asin_many(edited[[id_col] + BASE_PRODUCT_COLS].itertuples(index=False, name=None)):
+                    st.success("All changes saved!")
+                    st.experimental_rerun()
 
     # Select ASINs to Check Tab
     with tab_select:
         st.header("Select ASINs to Check Status")
-        df_asins = get_all_asins()
+        df_asins = get_all_asins(cols=["id"] + BASE_PRODUCT_COLS + ["Last Checked"])
         id_col = "id" if "id" in df_asins.columns else ("ID" if "ID" in df_asins.columns else None)
         if not id_col:
             st.error("Database missing id column.")
@@ -559,31 +840,26 @@ def asin_dashboard():
             filter_color = cols[3].text_input("Color", key="color_filter_select")
             filter_customer = cols[4].text_input("Customer", key="customer_filter_select")
             cutoff_str = cols[5].text_input("Not checked since (YYYY-MM-DD)", value="")
-            if filter_asin:
-                df_show = df_show[df_show["ASIN"].str.contains(filter_asin, case=False, na=False)]
-            if filter_collection:
-                df_show = df_show[df_show["Collection Name"].str.contains(filter_collection, case=False, na=False)]
-            if filter_size:
-                df_show = df_show[df_show["Size"].str.contains(filter_size, case=False, na=False)]
-            if filter_color:
-                df_show = df_show[df_show["Color"].str.contains(filter_color, case=False, na=False)]
-            if filter_customer:
-                df_show = df_show[df_show["Customer"].str.contains(filter_customer, case=False, na=False)]
+            df_show = apply_filters(df_show, [
+                ("ASIN", filter_asin),
+                ("Collection Name", filter_collection),
+                ("Size", filter_size),
+                ("Color", filter_color),
+                ("Customer", filter_customer),
+            ])
             if cutoff_str.strip():
                 try:
                     cutoff_dt = datetime.strptime(cutoff_str, "%Y-%m-%d")
-                    df_show = df_show[
-                        (df_show["Last Checked"].isnull()) | 
-                        (df_show["Last Checked"] == "") | 
-                        (df_show["Last Checked"] < cutoff_dt.strftime("%Y-%m-%d"))
-                    ]
+                    # Never-checked rows parse to NaT and always pass the filter
+                    last_checked = pd.to_datetime(df_show["Last Checked"], errors="coerce")
+                    df_show = df_show[last_checked.isna() | (last_checked < cutoff_dt)]
                 except Exception:
                     pass
 
         if "Last Checked" in df_show.columns:
             df_show["Last Checked"] = pd.to_datetime(df_show["Last Checked"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
         if "Price" in df_show.columns:
-            df_show["Price"] = df_show["Price"].apply(lambda x: f"${x}" if pd.notnull(x) and str(x).strip() != "" else "")
+            df_show["Price"] = format_price_column(df_show["Price"])
 
         df_show.insert(0, "Selected", False)
         df_show = select_all_checkbox(df_show, "statuscheck")
@@ -605,15 +881,11 @@ def asin_dashboard():
             else:
                 with st.spinner("Running status checks. Please wait..."):
                     run_status_check(selected_rows)
-                    st.success("Status check complete! Data updated.")
-                    st.experimental_rerun()
+                st.experimental_rerun()
 
     # Status Check Results Tab
     with tab_result:
         st.header("Status Check Results")
-        df_asins = get_all_asins()
-        df_display = df_asins.copy()
-
         with st.expander("Filters"):
             fcols = st.columns(8)
             filter_asin = fcols[0].text_input("ASIN", key="f_asin_results")
@@ -624,27 +896,18 @@ def asin_dashboard():
             filter_price = fcols[5].text_input("Price", key="f_price_results")
             filter_redirect = fcols[6].text_input("Is Redirect", key="f_redirect_results")
             filter_unavail = fcols[7].text_input("Is Unavailable", key="f_unavail_results")
-            if filter_asin:
-                df_display = df_display[df_display["ASIN"].str.contains(filter_asin, case=False, na=False)]
-            if filter_collection:
-                df_display = df_display[df_display["Collection Name"].str.contains(filter_collection, case=False, na=False)]
-            if filter_size:
-                df_display = df_display[df_display["Size"].str.contains(filter_size, case=False, na=False)]
-            if filter_color:
-                df_display = df_display[df_display["Color"].str.contains(filter_color, case=False, na=False)]
-            if filter_customer:
-                df_display = df_display[df_display["Customer"].str.contains(filter_customer, case=False, na=False)]
-            if filter_price:
-                df_display = df_display[df_display["Price"].astype(str).str.contains(filter_price, case=False, na=False)]
-            if filter_redirect:
-                df_display = df_display[df_display["Is Redirect"].str.contains(filter_redirect, case=False, na=False)]
-            if filter_unavail:
-                df_display = df_display[df_display["Is Unavailable"].str.contains(filter_unavail, case=False, na=False)]
-
-        if "Last Checked" in df_display.columns:
-            df_display["Last Checked"] = pd.to_datetime(df_display["Last Checked"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
-        if "Price" in df_display.columns:
-            df_display["Price"] = df_display["Price"].apply(lambda x: f"${x}" if pd.notnull(x) and str(x).strip() != "" else "")
+        result_filters = (
+            ("ASIN", filter_asin),
+            ("Collection Name", filter_collection),
+            ("Size", filter_size),
+            ("Color", filter_color),
+            ("Customer", filter_customer),
+            ("Price", filter_price),
+            ("Is Redirect", filter_redirect),
+            ("Is Unavailable", filter_unavail),
+        )
+        mtime = db_mtime()
+        df_display = build_results_frame(mtime, result_filters)
 
         # Coloring cells with conditional formatting using html in dataframe (green/red indicators)
         def color_status(val, good_val="No", bad_val="Yes"):
@@ -660,17 +923,14 @@ def asin_dashboard():
 
         st.dataframe(styled_df, use_container_width=True)
 
-        output = BytesIO()
-        df_display[BASE_PRODUCT_COLS + RESULT_COLS].to_excel(output, index=False)
-        output.seek(0)
+        output = build_report_excel(mtime, result_filters)
         col1, col2, col3 = st.columns([1,1,1])
         with col1:
             if st.button("Run Status Check"):
                 selected_asins = df_display.copy()  # To run on all - you may add selection logic if needed
                 with st.spinner("Running status checks. Please wait..."):
                     run_status_check(selected_asins)
-                    st.success("Status check complete! Data updated.")
-                    st.experimental_rerun()
+                st.experimental_rerun()
         with col2:
             st.download_button(
                 label="Download Report",
@@ -685,7 +945,7 @@ def asin_dashboard():
     # Summary Dashboard Tab
     with tab3:
         st.header("Summary Dashboard")
-        df_asins = get_all_asins()
+        df_asins = get_all_asins(cols=["Customer", "Collection Name", "URL", "Orderable"])
         df_data = df_asins
         if not df_data.empty:
             if "Orderable" not in df_data.columns:
@@ -700,13 +960,16 @@ def asin_dashboard():
 
                 summary = (
                     df_summary
-                    .groupby(["Collection Name", "Customer"])
+                    .assign(
+                        _ord=(df_summary["Orderable"] == "Yes").astype(np.int32),
+                        _noord=(df_summary["Orderable"] == "No").astype(np.int32)
+                    )
+                    .groupby(["Collection Name", "Customer"], as_index=False)
                     .agg(
                         Total_SKU=('URL', 'count'),
-                        Orderable=('Orderable', lambda x: (x == "Yes").sum()),
-                        Non_Orderable=('Orderable', lambda x: (x == "No").sum())
+                        Orderable=('_ord', 'sum'),
+                        Non_Orderable=('_noord', 'sum')
                     )
-                    .reset_index()
                 )
                 summary["Onsite %"] = (summary["Orderable"] / summary["Total_SKU"] * 100).round(1)
                 st.subheader("Summary by Collection and Customer")